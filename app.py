@@ -2,9 +2,12 @@ import os
 import io
 import uuid
 import base64
+import hashlib
+import queue
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, Iterator, List, Tuple, Union
 
 import streamlit as st
 import pandas as pd
@@ -21,10 +24,13 @@ except Exception:
 
 # ---- New: Import FPDF for PDF generation ----
 try:
-    from fpdf import FPDF
+    from fpdf import FPDF, FPDF_VERSION
     FPDF_OK = True
+    # fpdf2 returns the document as a bytearray; legacy fpdf 1.x returns a latin-1 str
+    FPDF2 = int(FPDF_VERSION.split('.')[0]) >= 2
 except Exception:
     FPDF_OK = False
+    FPDF2 = False
     
 # ==============================================================================
 # CONFIG & STYLING
@@ -84,10 +90,10 @@ st.markdown("""
 DB_PATH = "retail360.db"
 BILLS_DIR = "bills"
 QR_DIR = "exit_qr"
-os.makedirs(BILLS_DIR, exist_ok=True)
-os.makedirs(QR_DIR, exist_ok=True)
 
 TAX_RATE = 0.18  # 18% GST for India
+TAX_RATE_BP = round(TAX_RATE * 10000)  # same rate in basis points, for integer paisa arithmetic
+EXIT_CODE_PREFIXES = ("EXIT:", "EXIT-")  # QR payload / bare exit code
 
 # ==============================================================================
 # DATABASE LAYER (SQLite)
@@ -135,117 +141,286 @@ DDL = {
     """
 }
 
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_txn_timestamp ON transactions(timestamp DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_txn_items_trans ON transaction_items(trans_id);",
+]
+
+# Applied to every new connection: WAL lets readers run alongside a writer and the
+# rest trims fsyncs and keeps temp tables / ~20 MB of pages in memory.
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+]
+
+PRODUCT_COLUMNS = "product_id, barcode, product_name, brand, category, price, stock_quantity"
+
+# Kept as a single constant so sqlite3's per-connection statement cache always hits.
+# Served by the UNIQUE autoindex on barcode
+# (EXPLAIN QUERY PLAN: SEARCH products USING INDEX sqlite_autoindex_products_1 (barcode=?)).
+PRODUCT_BY_BARCODE_SQL = f"""
+    SELECT {PRODUCT_COLUMNS}
+    FROM products WHERE barcode = ?
+"""
+
+POOL_SIZE = 8  # idle connections kept for reuse; extras opened under load are closed on return
+
+class PooledConnection(sqlite3.Connection):
+    """Connection that keeps one cursor around for the hot product lookups."""
+    def lookup_cursor(self) -> sqlite3.Cursor:
+        cursor = getattr(self, '_lookup_cursor', None)
+        if cursor is None:
+            cursor = self._lookup_cursor = self.cursor()
+        return cursor
+
+# The pool lives in st.cache_resource, so connections (with their PRAGMAs, statement
+# caches and lookup cursors) outlive both script re-execution and the per-rerun
+# ScriptRunner threads. With WAL, concurrent checkout sessions read without queueing
+# behind one shared connection. Connections run in autocommit mode, so writers open
+# their own transaction with an explicit BEGIN.
 @st.cache_resource
-def get_conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+def _connection_pool() -> queue.Queue:
+    return queue.Queue(maxsize=POOL_SIZE)
+
+def _open_conn() -> PooledConnection:
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None,
+                           factory=PooledConnection)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+@contextmanager
+def get_conn() -> Iterator[PooledConnection]:
+    """Checks a connection out of the pool for the duration of the with-block."""
+    pool = _connection_pool()
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _open_conn()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+# Streamlit re-executes the whole script on every rerun, so a module-level flag would
+# reset each time; cache_resource makes this run once per server process instead.
+@st.cache_resource(show_spinner=False)
+def ensure_dirs():
+    os.makedirs(BILLS_DIR, exist_ok=True)
+    os.makedirs(QR_DIR, exist_ok=True)
 
 def init_db():
-    conn = get_conn()
-    cursor = conn.cursor()
-    for table_name, ddl in DDL.items():
-        cursor.execute(ddl)
-    conn.commit()
+    ensure_dirs()
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        for table_name, ddl in DDL.items():
+            cursor.execute(ddl)
+        for index_ddl in INDEXES:
+            cursor.execute(index_ddl)
 
 def load_products_from_csv(df: pd.DataFrame) -> bool:
     try:
-        df_clean = df.copy().fillna('')
-        conn = get_conn()
-        cursor = conn.cursor()
-        success_count = 0
-        for _, row in df_clean.iterrows():
+        df_clean = df.copy()
+        now = datetime.now().isoformat()
+        for col, default in [('stock_quantity', 100), ('description', ''), ('image_url', ''),
+                             ('created_at', now), ('updated_at', now)]:
+            if col not in df_clean.columns:
+                df_clean[col] = default
+
+        # Coerce whole columns at once; rows that fail numeric coercion are dropped below
+        product_ids = pd.to_numeric(df_clean['product_id'], errors='coerce')
+        prices = pd.to_numeric(df_clean['price'], errors='coerce')
+        stock = pd.to_numeric(df_clean['stock_quantity'], errors='coerce')
+        valid = product_ids.notna() & (product_ids % 1 == 0) & prices.notna() & stock.notna()
+        if not valid.all():
+            skipped = df_clean.loc[~valid, 'product_id'].astype(str).tolist()
+            st.warning(f"Skipped {len(skipped)} row(s) with invalid product_id, price or stock_quantity: {', '.join(skipped)}")
+
+        text_cols = ['barcode', 'product_name', 'brand', 'category', 'description',
+                     'image_url', 'created_at', 'updated_at']
+        text = df_clean.loc[valid, text_cols].fillna('').astype(str)
+        # .tolist() yields native Python scalars, which sqlite3 can bind (NumPy scalars it cannot)
+        rows = list(zip(
+            product_ids[valid].astype('int64').tolist(), text['barcode'].tolist(),
+            text['product_name'].tolist(), text['brand'].tolist(), text['category'].tolist(),
+            prices[valid].astype(float).tolist(), stock[valid].astype('int64').tolist(),
+            text['description'].tolist(), text['image_url'].tolist(),
+            text['created_at'].tolist(), text['updated_at'].tolist()
+        ))
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            # One transaction for the whole catalog instead of one commit per row
+            cursor.execute("BEGIN")
             try:
-                cursor.execute("""
+                cursor.executemany("""
                     INSERT OR REPLACE INTO products 
                     (product_id, barcode, product_name, brand, category, price, 
                      stock_quantity, description, image_url, created_at, updated_at)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    int(row['product_id']), str(row['barcode']), str(row['product_name']),
-                    str(row['brand']), str(row['category']), float(row['price']),
-                    int(row['stock_quantity']), str(row.get('description', '')),
-                    str(row.get('image_url', '')), str(row.get('created_at', datetime.now().isoformat())),
-                    str(row.get('updated_at', datetime.now().isoformat()))
-                ))
-                success_count += 1
-            except Exception as e:
-                st.warning(f"Skipped row {row.get('product_id', 'N/A')}: {str(e)}")
-        conn.commit()
-        return success_count
+                """, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        clear_product_stats()
+        return len(rows)
     except Exception as e:
         st.error(f"Error loading products: {str(e)}")
         return 0
 
 def get_product_by_barcode(barcode: str) -> Optional[Dict]:
-    conn = get_conn()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT product_id, barcode, product_name, brand, category, price, stock_quantity
-        FROM products WHERE barcode = ?
-    """, (str(barcode).strip(),))
-    row = cursor.fetchone()
+    with get_conn() as conn:
+        cursor = conn.lookup_cursor()
+        cursor.execute(PRODUCT_BY_BARCODE_SQL, (str(barcode).strip(),))
+        row = cursor.fetchone()
     if row:
-        return {
-            'product_id': row[0], 'barcode': row[1], 'product_name': row[2],
-            'brand': row[3], 'category': row[4], 'price': row[5], 'stock_quantity': row[6]
-        }
+        return dict(row)
     return None
 
+def get_products_by_barcodes(barcodes: List[str]) -> Dict[str, Dict]:
+    """Looks up several barcodes in one query; returns products keyed by (stripped) barcode."""
+    keys = list(dict.fromkeys(str(barcode).strip() for barcode in barcodes))
+    if not keys:
+        return {}
+    placeholders = ','.join('?' * len(keys))
+    with get_conn() as conn:
+        cursor = conn.lookup_cursor()
+        cursor.execute(f"""
+            SELECT {PRODUCT_COLUMNS}
+            FROM products WHERE barcode IN ({placeholders})
+        """, keys)
+        return {row['barcode']: dict(row) for row in cursor.fetchall()}
+
 def save_transaction(customer_name: str, cart_items: List[Dict], subtotal: float, 
                      tax_amount: float, total: float, utr: str) -> Tuple[str, str]:
     trans_id = f"TXN-{datetime.now().strftime('%Y%m%d%H%M%S')}-{str(uuid.uuid4())[:8]}"
     exit_code = f"EXIT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
     timestamp = datetime.now().isoformat()
-    conn = get_conn()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO transactions 
-        (trans_id, timestamp, customer_name, subtotal, tax_amount, total, utr, exit_code)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (trans_id, timestamp, customer_name or "Anonymous", subtotal, tax_amount, total, utr, exit_code))
-    for item in cart_items:
-        cursor.execute("""
-            INSERT INTO transaction_items 
-            (trans_id, product_id, qty, unit_price, line_total)
-            VALUES (?, ?, ?, ?, ?)
-        """, (trans_id, item['product_id'], item['qty'], item['price'], item['line_total']))
-    conn.commit()
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute("""
+                INSERT INTO transactions 
+                (trans_id, timestamp, customer_name, subtotal, tax_amount, total, utr, exit_code)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (trans_id, timestamp, customer_name or "Anonymous", subtotal, tax_amount, total, utr, exit_code))
+            cursor.executemany("""
+                INSERT INTO transaction_items 
+                (trans_id, product_id, qty, unit_price, line_total)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(trans_id, item['product_id'], item['qty'], item['price'], item['line_total'])
+                  for item in cart_items])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    clear_transaction_stats()
     return trans_id, exit_code
 
+def query_df(sql: str, params: Tuple = ()) -> pd.DataFrame:
+    """Runs a query and builds a DataFrame straight from the fetched rows."""
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+
 def get_transaction_by_exit_code(exit_code: str) -> Optional[Tuple[Dict, pd.DataFrame]]:
-    conn = get_conn()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT trans_id, timestamp, customer_name, subtotal, tax_amount, total, utr
-        FROM transactions WHERE exit_code = ?
-    """, (exit_code.strip(),))
-    transaction = cursor.fetchone()
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT trans_id, timestamp, customer_name, subtotal, tax_amount, total, utr
+            FROM transactions WHERE exit_code = ?
+        """, (exit_code.strip(),))
+        transaction = cursor.fetchone()
     if not transaction:
         return None
-    trans_data = {
-        'trans_id': transaction[0], 'timestamp': transaction[1], 'customer_name': transaction[2],
-        'subtotal': transaction[3], 'tax_amount': transaction[4], 'total': transaction[5], 'utr': transaction[6]
-    }
-    items_df = pd.read_sql_query("""
+    trans_data = dict(transaction)
+    items_df = query_df("""
         SELECT ti.product_id, p.product_name, p.brand, ti.qty, ti.unit_price, ti.line_total
         FROM transaction_items ti JOIN products p ON p.product_id = ti.product_id
         WHERE ti.trans_id = ?
-    """, conn, params=(transaction[0],))
+    """, (trans_data['trans_id'],))
     return trans_data, items_df
 
+# Admin analytics: cached briefly so widget reruns don't rescan the tables.
+# Writers clear the affected entries via clear_transaction_stats / clear_product_stats.
+@st.cache_data(ttl=30, show_spinner=False)
+def get_total_sales() -> float:
+    with get_conn() as conn:
+        return conn.execute("SELECT SUM(total) FROM transactions").fetchone()[0] or 0
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_transaction_count() -> int:
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_product_count() -> int:
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_recent_transactions(limit: int, with_exit_code: bool = False) -> pd.DataFrame:
+    columns = "trans_id, timestamp, customer_name, total, utr" + (", exit_code" if with_exit_code else "")
+    return query_df(f"""
+        SELECT {columns}
+        FROM transactions ORDER BY timestamp DESC LIMIT ?
+    """, (limit,))
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_products_preview(limit: int = 50) -> pd.DataFrame:
+    return query_df("SELECT * FROM products LIMIT ?", (limit,))
+
+def clear_transaction_stats():
+    get_total_sales.clear()
+    get_transaction_count.clear()
+    get_recent_transactions.clear()
+
+def clear_product_stats():
+    get_product_count.clear()
+    get_products_preview.clear()
+
 # ==============================================================================
 # UTILITY FUNCTIONS
 # ==============================================================================
-def decode_barcodes_from_image(image: Image.Image) -> List[str]:
+MAX_DECODE_SIDE = 1024  # printed barcodes stay readable at this size; zbar time scales with pixels
+
+def _decode_pil_image(image: Image.Image) -> List[str]:
+    # zbar only needs luminance: 1 byte/pixel instead of 3, and asarray avoids an extra copy
+    gray = image.convert('L')
+    if max(gray.size) > MAX_DECODE_SIDE:
+        gray.thumbnail((MAX_DECODE_SIDE, MAX_DECODE_SIDE), Image.BILINEAR)
+    decoded_objects = zbar_decode(np.asarray(gray))
+    return [obj.data.decode('utf-8') for obj in decoded_objects]
+
+# Keyed on a short blake2b digest; the leading underscore keeps Streamlit from hashing the frame itself
+@st.cache_data(max_entries=32, show_spinner=False)
+def _decode_image_bytes(image_digest: str, _image_bytes: bytes) -> List[str]:
+    return _decode_pil_image(Image.open(io.BytesIO(_image_bytes)))
+
+def decode_barcodes_from_image(image: Union[bytes, Image.Image]) -> List[str]:
+    """Decodes barcodes from encoded image bytes (memoized across reruns) or a PIL image."""
     if not PYZBAR_OK: return []
     try:
-        img_array = np.array(image)
-        decoded_objects = zbar_decode(img_array)
-        barcodes = [obj.data.decode('utf-8') for obj in decoded_objects]
-        return barcodes
+        if isinstance(image, (bytes, bytearray)):
+            image_digest = hashlib.blake2b(image, digest_size=8).hexdigest()
+            return _decode_image_bytes(image_digest, bytes(image))
+        return _decode_pil_image(image)
     except Exception as e:
         st.error(f"Error decoding barcode: {str(e)}")
         return []
 
+@st.cache_data(max_entries=256, show_spinner=False)
 def generate_qr_code(data: str) -> bytes:
     qr = qrcode.QRCode(version=1, box_size=10, border=5)
     qr.add_data(data)
@@ -255,43 +430,53 @@ def generate_qr_code(data: str) -> bytes:
     qr_image.save(img_buffer, format='PNG')
     return img_buffer.getvalue()
 
+# Static invoice layout, shared by every generate_pdf_invoice call
+PDF_TITLE_FONT = ("Arial", "B", 16)
+PDF_BODY_FONT = ("Arial", "", 12)
+PDF_TABLE_HEADER_FONT = ("Arial", "B", 10)
+PDF_TABLE_FONT = ("Arial", "", 10)
+PDF_TOTALS_FONT = ("Arial", "B", 12)
+PDF_FOOTER_FONT = ("Arial", "I", 10)
+PDF_COLUMNS = (("Product Name", 80), ("Qty", 30), ("Unit Price", 40), ("Total", 40))
+PDF_COLUMN_WIDTHS = tuple(width for _, width in PDF_COLUMNS)
+
 def generate_pdf_invoice(trans_data: Dict, items_df: pd.DataFrame) -> bytes:
     if not FPDF_OK:
-        st.error("❌ PDF generation library (fpdf) not found. Please run 'pip install fpdf'")
+        st.error("❌ PDF generation library (fpdf) not found. Please run 'pip install fpdf2'")
         return b''
     
     pdf = FPDF()
     pdf.add_page()
     
-    pdf.set_font("Arial", "B", 16)
+    pdf.set_font(*PDF_TITLE_FONT)
     pdf.cell(0, 10, "RETAIL360 INVOICE", 0, 1, 'C')
     pdf.ln(10)
 
-    pdf.set_font("Arial", "", 12)
+    pdf.set_font(*PDF_BODY_FONT)
     pdf.cell(0, 8, f"Transaction ID: {trans_data['trans_id']}", 0, 1)
     pdf.cell(0, 8, f"Date: {trans_data['timestamp'][:19]}", 0, 1)
     pdf.cell(0, 8, f"Customer: {trans_data['customer_name']}", 0, 1)
     pdf.cell(0, 8, f"UTR: {trans_data.get('utr', 'N/A')}", 0, 1)
     pdf.ln(10)
 
-    pdf.set_font("Arial", "B", 10)
-    pdf.cell(80, 8, "Product Name", 1)
-    pdf.cell(30, 8, "Qty", 1)
-    pdf.cell(40, 8, "Unit Price", 1)
-    pdf.cell(40, 8, "Total", 1)
+    pdf.set_font(*PDF_TABLE_HEADER_FONT)
+    for heading, width in PDF_COLUMNS:
+        pdf.cell(width, 8, heading, 1)
     pdf.ln()
 
-    pdf.set_font("Arial", "", 10)
-    for _, item in items_df.iterrows():
-        pdf.cell(80, 8, f"{item['product_name']} ({item['brand']})", 1)
-        pdf.cell(30, 8, str(item['qty']), 1)
-        pdf.cell(40, 8, f"Rs. {item['unit_price']:.2f}", 1)
-        pdf.cell(40, 8, f"Rs. {item['line_total']:.2f}", 1)
+    pdf.set_font(*PDF_TABLE_FONT)
+    name_w, qty_w, price_w, total_w = PDF_COLUMN_WIDTHS
+    line_items = items_df[['product_name', 'brand', 'qty', 'unit_price', 'line_total']]
+    for name, brand, qty, unit_price, line_total in line_items.itertuples(index=False, name=None):
+        pdf.cell(name_w, 8, f"{name} ({brand})", 1)
+        pdf.cell(qty_w, 8, str(qty), 1)
+        pdf.cell(price_w, 8, f"Rs. {unit_price:.2f}", 1)
+        pdf.cell(total_w, 8, f"Rs. {line_total:.2f}", 1)
         pdf.ln()
 
     pdf.ln(10)
     
-    pdf.set_font("Arial", "B", 12)
+    pdf.set_font(*PDF_TOTALS_FONT)
     pdf.cell(150, 8, "Subtotal:", 0, 0, 'R')
     pdf.cell(40, 8, f"Rs. {trans_data['subtotal']:.2f}", 0, 1, 'R')
     pdf.cell(150, 8, "Tax (18%):", 0, 0, 'R')
@@ -300,9 +485,11 @@ def generate_pdf_invoice(trans_data: Dict, items_df: pd.DataFrame) -> bytes:
     pdf.cell(40, 8, f"Rs. {trans_data['total']:.2f}", 0, 1, 'R')
     pdf.ln(10)
 
-    pdf.set_font("Arial", "I", 10)
+    pdf.set_font(*PDF_FOOTER_FONT)
     pdf.cell(0, 10, "Thank you for shopping with Retail360!", 0, 1, 'C')
 
+    if FPDF2:
+        return bytes(pdf.output())
     return pdf.output(dest='S').encode('latin1')
 
 def generate_text_invoice(trans_data: Dict, items_df: pd.DataFrame) -> str:
@@ -319,9 +506,10 @@ def generate_text_invoice(trans_data: Dict, items_df: pd.DataFrame) -> str:
     invoice_text += f"{'Product Name':<25} | {'Qty':>4} | {'Price':>8} | {'Total':>8}\n"
     invoice_text += "----------------------------------------------\n"
     
-    for _, item in items_df.iterrows():
-        product_name = (item['product_name'] + ' (' + item['brand'] + ')')[:24]
-        invoice_text += f"{product_name:<25} | {str(item['qty']):>4} | {item['unit_price']:>8.2f} | {item['line_total']:>8.2f}\n"
+    line_items = items_df[['product_name', 'brand', 'qty', 'unit_price', 'line_total']]
+    for name, brand, qty, unit_price, line_total in line_items.itertuples(index=False, name=None):
+        product_name = (name + ' (' + brand + ')')[:24]
+        invoice_text += f"{product_name:<25} | {str(qty):>4} | {unit_price:>8.2f} | {line_total:>8.2f}\n"
 
     invoice_text += "----------------------------------------------\n"
     invoice_text += f"Subtotal: {'Rs. ' + f'{trans_data['subtotal']:.2f}':>33}\n"
@@ -384,19 +572,22 @@ def checkout_interface():
     
     st.markdown("---")
     st.subheader("🛒 Shopping Cart")
-    display_cart()
+    cart_df = display_cart()
     
-    if st.session_state.cart:
+    if cart_df is not None:
         st.subheader("💳 Payment")
-        process_payment(customer_name)
+        process_payment(customer_name, cart_df)
 
 def add_item_to_cart(barcode: str):
-    product = get_product_by_barcode(barcode)
+    add_product_to_cart(barcode, get_product_by_barcode(barcode))
+
+def add_product_to_cart(barcode: str, product: Optional[Dict]):
     if product:
         if barcode in st.session_state.cart:
             st.session_state.cart[barcode]['qty'] += 1
         else:
-            st.session_state.cart[barcode] = {**product, 'qty': 1, 'line_total': product['price']}
+            st.session_state.cart[barcode] = {**product, 'qty': 1, 'line_total': product['price'],
+                                              'price_paisa': round(product['price'] * 100)}
         st.success(f"✅ Added: {product['product_name']} (₹{product['price']:.2f})")
     else:
         st.error(f"❌ Product not found for barcode: {barcode}")
@@ -404,11 +595,11 @@ def add_item_to_cart(barcode: str):
 def process_camera_image(image):
     if PYZBAR_OK:
         try:
-            pil_image = Image.open(image)
-            barcodes = decode_barcodes_from_image(pil_image)
+            barcodes = decode_barcodes_from_image(image.getvalue())
             if barcodes:
+                products = get_products_by_barcodes(barcodes)
                 for barcode in barcodes:
-                    add_item_to_cart(barcode)
+                    add_product_to_cart(barcode, products.get(barcode.strip()))
             else:
                 st.info("📷 No barcode detected. Try taking a clearer photo.")
         except Exception as e:
@@ -416,33 +607,43 @@ def process_camera_image(image):
     else:
         st.warning("⚠️ Barcode scanning not available. Please install pyzbar library.")
 
-def display_cart():
+def format_paisa(amount_paisa: int) -> str:
+    return f"{amount_paisa // 100}.{amount_paisa % 100:02d}"
+
+def build_cart_df(cart: Dict) -> pd.DataFrame:
+    """Builds the cart as a DataFrame with line totals computed in one vectorized pass."""
+    cart_df = pd.DataFrame.from_dict(cart, orient='index')
+    cart_df['line_total_paisa'] = cart_df['price_paisa'].to_numpy() * cart_df['qty'].to_numpy()
+    cart_df['line_total'] = cart_df['line_total_paisa'].to_numpy() / 100
+    return cart_df
+
+def cart_totals_paisa(cart_df: pd.DataFrame) -> Tuple[int, int, int]:
+    """Returns (subtotal, tax, total) in integer paisa; tax is rounded half up to the paisa."""
+    subtotal_paisa = int(cart_df['line_total_paisa'].sum())
+    tax_paisa = (subtotal_paisa * TAX_RATE_BP + 5000) // 10000
+    return subtotal_paisa, tax_paisa, subtotal_paisa + tax_paisa
+
+def display_cart() -> Optional[pd.DataFrame]:
     if not st.session_state.cart:
         st.info("🛒 Your cart is empty. Scan products to add items!")
-        return
-    
-    cart_data = []
-    total = 0
-    for barcode, item in st.session_state.cart.items():
-        line_total = item['price'] * item['qty']
-        cart_data.append({'Product': item['product_name'], 'Brand': item['brand'],
-                         'Price': f"₹{item['price']:.2f}", 'Qty': item['qty'],
-                         'Total': f"₹{line_total:.2f}"})
-        total += line_total
+        return None
     
-    cart_df = pd.DataFrame(cart_data)
-    st.dataframe(cart_df, use_container_width=True, hide_index=True)
+    cart_df = build_cart_df(st.session_state.cart)
+    display_df = pd.DataFrame({
+        'Product': cart_df['product_name'], 'Brand': cart_df['brand'],
+        'Price': '₹' + cart_df['price'].map('{:.2f}'.format), 'Qty': cart_df['qty'],
+        'Total': '₹' + cart_df['line_total'].map('{:.2f}'.format)
+    })
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
     
-    subtotal = total
-    tax_amount = subtotal * TAX_RATE
-    grand_total = subtotal + tax_amount
+    subtotal_paisa, tax_paisa, total_paisa = cart_totals_paisa(cart_df)
     
     st.markdown(f"""
     <div class="cart-item">
         <strong>💰 Cart Summary:</strong><br>
-        Subtotal: ₹{subtotal:.2f}<br>
-        Tax (18%): ₹{tax_amount:.2f}<br>
-        <strong>Total: ₹{grand_total:.2f}</strong>
+        Subtotal: ₹{format_paisa(subtotal_paisa)}<br>
+        Tax (18%): ₹{format_paisa(tax_paisa)}<br>
+        <strong>Total: ₹{format_paisa(total_paisa)}</strong>
     </div>
     """, unsafe_allow_html=True)
     
@@ -459,14 +660,15 @@ def display_cart():
             
         if refresh_button:
             st.rerun()
+    
+    return cart_df
 
-def process_payment(customer_name: str):
-    if not st.session_state.cart:
+def process_payment(customer_name: str, cart_df: pd.DataFrame):
+    if cart_df.empty:
         return
     
-    subtotal = sum(item['price'] * item['qty'] for item in st.session_state.cart.values())
-    tax_amount = subtotal * TAX_RATE
-    grand_total = subtotal + tax_amount
+    subtotal_paisa, tax_paisa, total_paisa = cart_totals_paisa(cart_df)
+    subtotal, tax_amount, grand_total = subtotal_paisa / 100, tax_paisa / 100, total_paisa / 100
     
     utr = st.text_input("💳 UPI Transaction Reference (UTR)", placeholder="Enter UTR after payment")
     
@@ -476,10 +678,7 @@ def process_payment(customer_name: str):
             return
         
         try:
-            cart_items = [{
-                'product_id': item['product_id'], 'qty': item['qty'], 'price': item['price'],
-                'line_total': item['price'] * item['qty']
-            } for item in st.session_state.cart.values()]
+            cart_items = cart_df[['product_id', 'qty', 'price', 'line_total']].to_dict('records')
             
             trans_id, exit_code = save_transaction(customer_name, cart_items, subtotal, tax_amount, grand_total, utr)
             
@@ -488,11 +687,8 @@ def process_payment(customer_name: str):
                 'customer_name': customer_name or "Anonymous", 'subtotal': subtotal,
                 'tax_amount': tax_amount, 'total': grand_total, 'utr': utr
             }
-            items_df = pd.DataFrame([
-                {'product_name': item['product_name'], 'brand': item['brand'], 'qty': item['qty'],
-                 'unit_price': item['price'], 'line_total': item['price'] * item['qty']}
-                for item in st.session_state.cart.values()
-            ])
+            items_df = cart_df[['product_name', 'brand', 'qty', 'price', 'line_total']].rename(
+                columns={'price': 'unit_price'})
             
             invoice_pdf_bytes = generate_pdf_invoice(trans_data, items_df)
             invoice_text = generate_text_invoice(trans_data, items_df)
@@ -531,11 +727,10 @@ def exit_verification_interface():
     
     if exit_camera and PYZBAR_OK:
         try:
-            pil_image = Image.open(exit_camera)
-            codes = decode_barcodes_from_image(pil_image)
+            codes = decode_barcodes_from_image(exit_camera.getvalue())
             if codes:
                 for code in codes:
-                    if code.startswith("EXIT:") or code.startswith("EXIT-"):
+                    if code.startswith(EXIT_CODE_PREFIXES):
                         verify_exit_code(code)
             else:
                 st.warning("📷 No QR code detected. Please ensure the QR code is clearly visible and try again.")
@@ -603,23 +798,19 @@ def admin_interface():
         
         with tab2:
             st.subheader("📊 Business Analytics")
-            conn = get_conn()
             col1, col2, col3 = st.columns(3)
             with col1:
-                total_sales = pd.read_sql_query("SELECT SUM(total) as total FROM transactions", conn).iloc[0, 0] or 0
+                total_sales = get_total_sales()
                 st.metric("💰 Total Sales", f"₹{total_sales:.2f}")
             with col2:
-                total_transactions = pd.read_sql_query("SELECT COUNT(*) as count FROM transactions", conn).iloc[0, 0]
+                total_transactions = get_transaction_count()
                 st.metric("🧾 Total Transactions", total_transactions)
             with col3:
-                total_products = pd.read_sql_query("SELECT COUNT(*) as count FROM products", conn).iloc[0, 0]
+                total_products = get_product_count()
                 st.metric("📦 Total Products", total_products)
             
             st.subheader("📈 Recent Transactions")
-            recent_transactions = pd.read_sql_query("""
-                SELECT trans_id, timestamp, customer_name, total, utr
-                FROM transactions ORDER BY timestamp DESC LIMIT 10
-            """, conn)
+            recent_transactions = get_recent_transactions(10)
             if not recent_transactions.empty:
                 st.dataframe(recent_transactions, use_container_width=True, hide_index=True)
             else:
@@ -627,18 +818,14 @@ def admin_interface():
         
         with tab3:
             st.subheader("🗄️ Database Browser")
-            conn = get_conn()
             st.write("**📦 Products**")
-            products_df = pd.read_sql_query("SELECT * FROM products LIMIT 50", conn)
+            products_df = get_products_preview(50)
             if not products_df.empty:
                 st.dataframe(products_df, use_container_width=True, hide_index=True)
             else:
                 st.info("No products in database. Upload CSV to add products.")
             st.write("**🧾 Transactions**")
-            transactions_df = pd.read_sql_query("""
-                SELECT trans_id, timestamp, customer_name, total, utr, exit_code
-                FROM transactions ORDER BY timestamp DESC LIMIT 20
-            """, conn)
+            transactions_df = get_recent_transactions(20, with_exit_code=True)
             if not transactions_df.empty:
                 st.dataframe(transactions_df, use_container_width=True, hide_index=True)
             else: